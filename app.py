@@ -1,19 +1,404 @@
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
+import time
+_module_load_started = time.perf_counter()
+
+import os
 import uuid
 import json
+import io
 from datetime import datetime, timedelta
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import threading
-import time
+import functools
+import bisect
+import math
+import heapq
+from collections import namedtuple
+from contextlib import contextmanager
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g
+
+# Serverless mode (auto-enabled on Vercel): clearing advances on request instead of
+# in background threads, and optional imports are deferred to keep cold starts fast
+SERVERLESS_MODE = os.getenv('SERVERLESS_MODE', os.getenv('VERCEL', '0')).lower() in ('1', 'true', 'yes')
+CORS_ENABLED = os.getenv('ENABLE_CORS', '0' if SERVERLESS_MODE else '1').lower() in ('1', 'true', 'yes')
+
+# Profiling: enabled for every request with PROFILE_REQUESTS, or per request with an
+# "X-Profile" header when PROFILE_ALLOW_HEADER opts in (off by default, since profiled
+# requests write files). PROFILE_MODE picks the extra profiler: "sample", "cprofile" or "spans"
+PROFILING_ENABLED = os.getenv('PROFILE_REQUESTS', '0').lower() in ('1', 'true', 'yes')
+PROFILE_ALLOW_HEADER = os.getenv('PROFILE_ALLOW_HEADER', '0').lower() in ('1', 'true', 'yes')
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample').lower()
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles' if SERVERLESS_MODE else 'profiles')
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.001'))
+
+# Level of app.logger, e.g. for the cold start timing logged at startup
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# Event sourcing: the event store snapshots its projected state every N events
+EVENT_SNAPSHOT_INTERVAL = int(os.getenv('EVENT_SNAPSHOT_INTERVAL', '10000'))
 
 app = Flask(__name__)
-CORS(app)
+app.logger.setLevel(LOG_LEVEL)
+if CORS_ENABLED:
+    from flask_cors import CORS
+    CORS(app)
 
 # In-memory storage for transfers and bank accounts
 transfers = {}
 bank_accounts = {}
+# Transfers still clearing in serverless mode, advanced on each request. A dict of
+# transfer id -> transfer so the sweep sees them in the order they were created
+pending_clearing = {}
+# Identifies this process, so clients can tell a restarted server (fresh state) apart
+SERVER_INSTANCE_ID = uuid.uuid4().hex
+# Global change counter: every transfer update takes the next version, so clients
+# can fetch only the transfers changed since the last version they saw
+latest_transfer_version = 0
+_transfer_version_lock = threading.Lock()
+
+def bump_transfer_version(transfer):
+    """Give a transfer the next version; assigned under the lock so a reader that sees
+    latest_transfer_version >= v also sees the transfer at version v"""
+    global latest_transfer_version
+    with _transfer_version_lock:
+        latest_transfer_version += 1
+        transfer.version = latest_transfer_version
+
+def current_transfer_version():
+    with _transfer_version_lock:
+        return latest_transfer_version
+
+class Trace:
+    """Span timings for one profiled request, aggregated as collapsed stacks
+
+    Each stack ("create_transfer;WireTransfer.__init__;generate_pacs_008") maps to the
+    self time in microseconds spent in its innermost span, which is the folded format
+    flamegraph.pl, speedscope and inferno consume. Transfers created during the request
+    hold the trace so their clearing stages are recorded into it as well.
+    """
+    def __init__(self, name):
+        self.id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.stacks = {}
+        self.holds = 1  # Released by the request itself
+        self.lock = threading.Lock()
+
+    def add(self, stack, micros):
+        with self.lock:
+            self.stacks[stack] = self.stacks.get(stack, 0) + micros
+
+    def hold(self):
+        with self.lock:
+            self.holds += 1
+
+    def release(self):
+        """Drop a hold; the spans file is (re)written once the last hold is released"""
+        with self.lock:
+            self.holds -= 1
+            finished = self.holds == 0
+        if finished:
+            self.write()
+        return finished
+
+    def write(self):
+        with self.lock:
+            stacks = dict(self.stacks)
+        write_folded(os.path.join(PROFILE_DIR, f"{self.id}.spans.folded"), stacks)
+
+def write_folded(path, stacks):
+    """Write collapsed stacks ("frame;frame;frame count" per line)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in sorted(stacks.items()):
+            if count > 0:
+                f.write(f"{stack} {count}\n")
+
+class StackSampler:
+    """Statistical profiler sampling one thread's Python stack at a fixed interval"""
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        import sys
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                stack = ';'.join(reversed(frames))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+# Active trace and span stack of the current thread
+_profiling = threading.local()
+
+def current_trace():
+    return getattr(_profiling, 'trace', None)
+
+@contextmanager
+def tracing(trace):
+    """Record spans on this thread into the given trace (or nowhere if None)"""
+    previous = (current_trace(), getattr(_profiling, 'spans', None))
+    _profiling.trace, _profiling.spans = trace, []
+    try:
+        yield trace
+    finally:
+        _profiling.trace, _profiling.spans = previous
+
+def enter_span(name):
+    if current_trace() is not None:
+        # [name, start time, time spent in child spans]
+        _profiling.spans.append([name, time.perf_counter(), 0.0])
+
+def exit_span():
+    trace = current_trace()
+    if trace is None or not _profiling.spans:
+        return
+    stack = _profiling.spans
+    name, started, children = stack[-1]
+    elapsed = time.perf_counter() - started
+    trace.add(';'.join(span[0] for span in stack), int((elapsed - children) * 1_000_000))
+    stack.pop()
+    if stack:
+        stack[-1][2] += elapsed
+
+@contextmanager
+def profile_span(name):
+    """Time a block as a span of the current trace; a no-op when not profiling"""
+    enter_span(name)
+    try:
+        yield
+    finally:
+        exit_span()
+
+def profiled(name):
+    """Decorator recording each call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_trace() is None:
+                return func(*args, **kwargs)
+            with profile_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Immutable lifecycle event. `data` holds the event-specific payload.
+Event = namedtuple('Event', ['seq', 'timestamp', 'type', 'transfer_id', 'account_id', 'data'])
+
+# Projected state of a transfer, rebuilt from its events
+TransferState = namedtuple('TransferState', [
+    'id', 'status', 'amount', 'currency', 'debtor_account', 'creditor_account', 'updated_at', 'last_event'
+])
+
+# Status a transfer is in after each lifecycle event
+EVENT_STATUSES = {
+    'INITIATED': 'PENDING',
+    'VALIDATED': 'VALIDATING',
+    'RESERVED': 'VALIDATING',
+    'REJECTED': 'FAILED',
+    'ROUTED': 'PROCESSING',
+    'SETTLED': 'SETTLING',
+    'CREDITED': 'COMPLETED',
+    'CONFIRMED': 'COMPLETED'
+}
+
+# Events after which a transfer receives no further events
+TERMINAL_EVENTS = ('CONFIRMED', 'REJECTED')
+
+def apply_event(transfer_states, balances, event):
+    """Apply one event to a projection (transfer states and account balances)
+
+    Besides lifecycle events this understands the SNAPSHOT_ACCOUNT / SNAPSHOT_TRANSFER
+    header records that /events/export writes to seed a replay starting mid-log.
+    """
+    if event.type in ('ACCOUNT_OPENED', 'SNAPSHOT_ACCOUNT'):
+        balances[event.account_id] = event.data['balance']
+        return
+    if event.type == 'SNAPSHOT_TRANSFER':
+        transfer_states[event.transfer_id] = TransferState(
+            **dict(event.data, updated_at=datetime.fromisoformat(event.data['updated_at']))
+        )
+        return
+    if event.type == 'INITIATED':
+        data = event.data
+        transfer_states[event.transfer_id] = TransferState(
+            event.transfer_id, 'PENDING', data['amount'], data['currency'],
+            data['debtor_account'], data['creditor_account'], event.timestamp, event.type
+        )
+        return
+    state = transfer_states[event.transfer_id]
+    if event.type == 'RESERVED':
+        balances[state.debtor_account] -= state.amount
+    elif event.type == 'CREDITED':
+        balances[state.creditor_account] += state.amount
+    transfer_states[event.transfer_id] = state._replace(
+        status=EVENT_STATUSES[event.type], updated_at=event.timestamp, last_event=event.type
+    )
+
+def project_events(events, transfer_states=None, balances=None):
+    """Fold events into a projection, starting from an optional snapshot"""
+    transfer_states = {} if transfer_states is None else transfer_states
+    balances = {} if balances is None else balances
+    for event in events:
+        apply_event(transfer_states, balances, event)
+    return transfer_states, balances
+
+def snapshot_records(at, transfer_states, balances):
+    """Header records seeding a replay with the state as of `at`
+
+    Every balance is included, but only transfers that are still open, since closed
+    transfers receive no further events.
+    """
+    for account_id, balance in balances.items():
+        yield Event(0, at, 'SNAPSHOT_ACCOUNT', None, account_id, {'balance': balance})
+    for state in transfer_states.values():
+        if state.last_event not in TERMINAL_EVENTS:
+            data = state._asdict()
+            data['updated_at'] = state.updated_at.isoformat()
+            yield Event(0, at, 'SNAPSHOT_TRANSFER', state.id, None, data)
+
+def event_to_dict(event):
+    data = event._asdict()
+    data['timestamp'] = event.timestamp.isoformat()
+    return data
+
+def event_from_dict(data):
+    return Event(data['seq'], datetime.fromisoformat(data['timestamp']), data['type'],
+                 data['transfer_id'], data['account_id'], data['data'])
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp, converting timezone-aware values to naive local time"""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+class _ChangeTrackingDict(dict):
+    """Dict remembering which keys were assigned since the last snapshot"""
+    def __init__(self):
+        super().__init__()
+        self.changed = set()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.changed.add(key)
+
+class EventStore:
+    """Append-only log of lifecycle events with periodic delta snapshots
+
+    Events keep their real timestamps and are kept in (timestamp, seq) order, so a
+    stage caught up late in serverless mode still lands at the time it took effect.
+    The store keeps a live projection up to date as events are appended, and every
+    `snapshot_interval` events records only the transfer states and balances that
+    changed since the previous snapshot. State at any point in time is rebuilt by
+    merging the snapshots before it and replaying the events in between.
+    """
+    def __init__(self, snapshot_interval=EVENT_SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+        self.seq = 0
+        # Events and their timestamps in (timestamp, seq) order
+        self.events = []
+        self.timestamps = []
+        self.by_transfer = {}
+        # (position in self.events, changed transfer states, changed balances)
+        self.snapshots = [(0, {}, {})]
+        self.snapshot_positions = [0]
+        self.transfer_states = _ChangeTrackingDict()
+        self.balances = _ChangeTrackingDict()
+        self.lock = threading.Lock()
+
+    def append(self, event_type, timestamp=None, transfer_id=None, account_id=None, data=None):
+        with self.lock:
+            timestamp = timestamp or datetime.now()
+            self.seq += 1
+            event = Event(self.seq, timestamp, event_type, transfer_id, account_id, data or {})
+            apply_event(self.transfer_states, self.balances, event)
+            if not self.timestamps or timestamp >= self.timestamps[-1]:
+                position = len(self.events)
+            else:
+                # Stamped before events already logged, e.g. a clearing stage caught up
+                # late in serverless mode; later snapshots no longer cover a prefix
+                position = bisect.bisect_right(self.timestamps, timestamp)
+                self._discard_snapshots_after(position)
+            self.events.insert(position, event)
+            self.timestamps.insert(position, timestamp)
+            if transfer_id is not None:
+                self.by_transfer.setdefault(transfer_id, []).append(event)
+            if len(self.events) % self.snapshot_interval == 0:
+                self._take_snapshot()
+            return event
+
+    def _take_snapshot(self):
+        self.snapshots.append((
+            len(self.events),
+            {key: self.transfer_states[key] for key in self.transfer_states.changed},
+            {key: self.balances[key] for key in self.balances.changed}
+        ))
+        self.snapshot_positions.append(len(self.events))
+        self.transfer_states.changed = set()
+        self.balances.changed = set()
+
+    def _discard_snapshots_after(self, position):
+        # Their changes fold back into the next snapshot's delta
+        while self.snapshot_positions[-1] > position:
+            _, transfer_changes, balance_changes = self.snapshots.pop()
+            self.snapshot_positions.pop()
+            self.transfer_states.changed.update(transfer_changes)
+            self.balances.changed.update(balance_changes)
+
+    def position_at(self, at=None):
+        """Number of events at or before a point in time"""
+        if at is None:
+            return len(self.events)
+        return bisect.bisect_right(self.timestamps, at)
+
+    def events_between(self, since=None, until=None):
+        """Events after `since` up to and including `until`, in time order"""
+        with self.lock:
+            start = self.position_at(since) if since else 0
+            return self.events[start:self.position_at(until)]
+
+    def state_at(self, at=None):
+        """Rebuild transfer states and balances as of a point in time (snapshots + delta)"""
+        with self.lock:
+            position = self.position_at(at)
+            index = bisect.bisect_right(self.snapshot_positions, position) - 1
+            snapshots = self.snapshots[:index + 1]
+            delta = self.events[self.snapshot_positions[index]:position]
+        transfer_states, balances = {}, {}
+        for _, transfer_changes, balance_changes in snapshots:
+            transfer_states.update(transfer_changes)
+            balances.update(balance_changes)
+        return position, project_events(delta, transfer_states, balances)
+
+    def transfer_events(self, transfer_id, at=None):
+        return [event for event in self.by_transfer.get(transfer_id, [])
+                if at is None or event.timestamp <= at]
+
+    def transfer_at(self, transfer_id, at=None):
+        """State of a single transfer as of a point in time, or None if not yet initiated"""
+        transfer_states = {}
+        project_events(self.transfer_events(transfer_id, at), transfer_states, _BalanceSink())
+        return transfer_states.get(transfer_id)
+
+class _BalanceSink(dict):
+    """Balances stand-in for single-transfer replays, which don't track accounts"""
+    def __missing__(self, key):
+        return 0
+
+event_store = EventStore()
 
 class BankAccount:
     def __init__(self, account_number, institution_number, transit_number, account_holder, currency="CAD", initial_balance=10000.00):
@@ -26,11 +411,11 @@ class BankAccount:
         self.transactions = []
         self.account_id = f"{institution_number}-{transit_number}-{account_number}"
     
-    def debit(self, amount, description, transfer_id):
+    def debit(self, amount, description, transfer_id, timestamp=None):
         if self.balance >= amount:
             self.balance -= amount
             self.transactions.append({
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": (timestamp or datetime.now()).isoformat(),
                 "type": "DEBIT",
                 "amount": amount,
                 "description": description,
@@ -40,10 +425,10 @@ class BankAccount:
             return True
         return False
     
-    def credit(self, amount, description, transfer_id):
+    def credit(self, amount, description, transfer_id, timestamp=None):
         self.balance += amount
         self.transactions.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": (timestamp or datetime.now()).isoformat(),
             "type": "CREDIT",
             "amount": amount,
             "description": description,
@@ -60,10 +445,27 @@ class BankAccount:
             "transactions": self.transactions
         }
 
+def record_account_opened(account_id, account):
+    """Log the opening balance of a newly registered account"""
+    event_store.append('ACCOUNT_OPENED', account_id=account_id, data={
+        'account_holder': account.account_holder,
+        'currency': account.currency,
+        'balance': account.balance
+    })
+
 class WireTransfer:
+    @profiled('WireTransfer.__init__')
     def __init__(self, debtor_name, institution_number, transit_number, account_number,
-                 creditor_name, creditor_iban, creditor_bic, amount, currency, purpose):
+                 creditor_name, creditor_iban, creditor_bic, amount, currency, purpose,
+                 pacs_008_xml=None, defer_clearing=False, original_msg_id=None,
+                 instruction_id=None, end_to_end_id=None, transaction_id=None):
         self.id = str(uuid.uuid4())
+        # Payment identification; inbound transfers keep the sender's ids so that the
+        # status reports we send back (pacs.002/004/007) reference them
+        self.original_msg_id = original_msg_id or f"LYNX{self.id[:16].upper()}"
+        self.instruction_id = instruction_id or f"LYNX{self.id[:16].upper()}"
+        self.end_to_end_id = end_to_end_id or f"E2E{self.id[:16].upper()}"
+        self.transaction_id = transaction_id or self.instruction_id
         self.debtor_name = debtor_name
         self.institution_number = institution_number
         self.transit_number = transit_number
@@ -76,22 +478,43 @@ class WireTransfer:
         self.purpose = purpose
         self.created_at = datetime.now().isoformat()
         self.status = "PENDING"
-        self.pacs_008_xml = self.generate_pacs_008()
+        # Inbound transfers keep the CdtTrfTxInf they arrived with (re-serialised)
+        self.pacs_008_xml = pacs_008_xml or self.generate_pacs_008()
         self.pacs_002_xml = None
         self.pacs_004_xml = None
         self.pacs_007_xml = None
         self.processing_steps = []
         self.bank_accounts_affected = []
+        self.version = 0
+        self.clearing_stage = 0
+        self.clearing_halted = False
+        self.clearing_lock = threading.Lock()
+        self.defer_clearing = defer_clearing
+        # Clearing stages are recorded into the trace of the request that created us
+        self.trace = current_trace()
+        if self.trace is not None:
+            self.trace.hold()
         
         # Initialize or get bank accounts
         self.initialize_bank_accounts()
         
+        # Publish before the first version bump so a delta fetch that sees the version
+        # also finds the transfer (version 0 is never reported)
+        transfers[self.id] = self
+        
         self.add_processing_step("Transfer initiated", "PENDING", 
                                f"Customer initiated wire transfer of {self.amount} {self.currency} from {self.debtor_name} to {self.creditor_name}")
+        self.record_event('INITIATED', data={
+            'amount': self.amount,
+            'currency': self.currency,
+            'debtor_account': self.bank_accounts_affected[0],
+            'creditor_account': self.bank_accounts_affected[1]
+        })
         
         # Start the clearing and settlement simulation
         self.start_clearing_simulation()
 
+    @profiled('initialize_bank_accounts')
     def initialize_bank_accounts(self):
         """Initialize or get existing bank accounts for the transfer"""
         # Debtor account
@@ -104,6 +527,7 @@ class WireTransfer:
                 self.debtor_name,
                 self.currency
             )
+            record_account_opened(debtor_account_id, bank_accounts[debtor_account_id])
         
         # Creditor account (simulated)
         creditor_account_id = f"CREDITOR-{self.creditor_iban[-8:]}"
@@ -115,24 +539,35 @@ class WireTransfer:
                 self.creditor_name,
                 self.currency
             )
+            record_account_opened(creditor_account_id, bank_accounts[creditor_account_id])
         
         self.debtor_account = bank_accounts[debtor_account_id]
         self.creditor_account = bank_accounts[creditor_account_id]
         self.bank_accounts_affected = [debtor_account_id, creditor_account_id]
 
-    def add_processing_step(self, step_name, status, details=""):
+    def record_event(self, event_type, at=None, data=None):
+        """Append a lifecycle event for this transfer to the event store"""
+        return event_store.append(event_type, at, transfer_id=self.id, data=data)
+
+    def add_processing_step(self, step_name, status, details="", timestamp=None):
         """Add a processing step to the transfer"""
         step = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": (timestamp or datetime.now()).isoformat(),
             "step": step_name,
             "status": status,
             "details": details
         }
         self.processing_steps.append(step)
         self.status = status
+        # Bumped last so a delta fetch never sees the new version with the old state
+        bump_transfer_version(self)
 
+    @profiled('generate_pacs_002')
     def generate_pacs_002(self):
         """Generate ISO 20022 PACS.002 (Payment Status Report) message"""
+        import xml.etree.ElementTree as ET
+        from xml.dom import minidom
+
         root = ET.Element("Document", {
             "xmlns": "urn:iso:std:iso:20022:tech:xsd:pacs.002.001.12",
             "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance"
@@ -150,16 +585,16 @@ class WireTransfer:
         # Original Group Information
         orgnl_grp_inf = ET.SubElement(fitofi, "OrgnlGrpInf")
         orgnl_msg_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgId")
-        orgnl_msg_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_msg_id.text = self.original_msg_id
         orgnl_msg_nm_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgNmId")
         orgnl_msg_nm_id.text = "pacs.008.001.10"
         
         # Transaction Information
         tx_inf = ET.SubElement(fitofi, "TxInf")
         orgnl_end_to_end_id = ET.SubElement(tx_inf, "OrgnlEndToEndId")
-        orgnl_end_to_end_id.text = f"E2E{self.id[:16].upper()}"
+        orgnl_end_to_end_id.text = self.end_to_end_id
         orgnl_tx_id = ET.SubElement(tx_inf, "OrgnlTxId")
-        orgnl_tx_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_tx_id.text = self.transaction_id
         
         # Transaction Status
         tx_sts = ET.SubElement(tx_inf, "TxSts")
@@ -175,8 +610,12 @@ class WireTransfer:
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="  ")
 
+    @profiled('generate_pacs_004')
     def generate_pacs_004(self):
         """Generate ISO 20022 PACS.004 (Payment Return) message (for failed transfers)"""
+        import xml.etree.ElementTree as ET
+        from xml.dom import minidom
+
         root = ET.Element("Document", {
             "xmlns": "urn:iso:std:iso:20022:tech:xsd:pacs.004.001.10",
             "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance"
@@ -194,7 +633,7 @@ class WireTransfer:
         # Original Group Information
         orgnl_grp_inf = ET.SubElement(fitofi, "OrgnlGrpInf")
         orgnl_msg_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgId")
-        orgnl_msg_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_msg_id.text = self.original_msg_id
         orgnl_msg_nm_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgNmId")
         orgnl_msg_nm_id.text = "pacs.008.001.10"
         
@@ -203,7 +642,7 @@ class WireTransfer:
         rvsl_id = ET.SubElement(tx_inf, "RvslId")
         rvsl_id.text = f"REV{self.id[:16].upper()}"
         orgnl_tx_id = ET.SubElement(tx_inf, "OrgnlTxId")
-        orgnl_tx_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_tx_id.text = self.transaction_id
         
         # Returned Interbank Settlement Amount
         rtrd_intr_bk_sttlm_amt = ET.SubElement(tx_inf, "RtrdIntrBkSttlmAmt")
@@ -220,8 +659,12 @@ class WireTransfer:
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="  ")
 
+    @profiled('generate_pacs_007')
     def generate_pacs_007(self):
         """Generate ISO 20022 PACS.007 (Payment Cancellation Request) message"""
+        import xml.etree.ElementTree as ET
+        from xml.dom import minidom
+
         root = ET.Element("Document", {
             "xmlns": "urn:iso:std:iso:20022:tech:xsd:pacs.007.001.10",
             "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance"
@@ -239,7 +682,7 @@ class WireTransfer:
         # Original Group Information
         orgnl_grp_inf = ET.SubElement(fitofi, "OrgnlGrpInf")
         orgnl_msg_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgId")
-        orgnl_msg_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_msg_id.text = self.original_msg_id
         orgnl_msg_nm_id = ET.SubElement(orgnl_grp_inf, "OrgnlMsgNmId")
         orgnl_msg_nm_id.text = "pacs.008.001.10"
         
@@ -248,7 +691,7 @@ class WireTransfer:
         cxl_id = ET.SubElement(tx_inf, "CxlId")
         cxl_id.text = f"CXL{self.id[:16].upper()}"
         orgnl_tx_id = ET.SubElement(tx_inf, "OrgnlTxId")
-        orgnl_tx_id.text = f"LYNX{self.id[:16].upper()}"
+        orgnl_tx_id.text = self.transaction_id
         
         # Cancellation Reason
         cxl_rsn_inf = ET.SubElement(tx_inf, "CxlRsnInf")
@@ -260,12 +703,69 @@ class WireTransfer:
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="  ")
 
+    # Clearing pipeline: (seconds after the previous stage, stage method)
+    CLEARING_STAGES = [
+        (2, 'clear_validate_message'),
+        (3, 'clear_reserve_funds'),
+        (2, 'clear_send_to_network'),
+        (4, 'clear_settle'),
+        (2, 'clear_credit_beneficiary'),
+        (1, 'clear_send_confirmation'),
+    ]
+
+    @property
+    def clearing_system(self):
+        return "Lynx" if self.currency == "CAD" else "SWIFT"
+
+    @profiled('start_clearing_simulation')
     def start_clearing_simulation(self):
         """Simulate the clearing and settlement process"""
+        if SERVERLESS_MODE or self.defer_clearing:
+            # Background threads die when the invocation freezes (and one thread per
+            # transfer doesn't scale to bulk ingestion), so stages are caught up from
+            # elapsed time by sweep_pending_clearing() on each request or clearing sweep
+            pending_clearing[self.id] = self
+            return
+
         def simulate_clearing():
-            # Step 1: Message validation (2 seconds)
-            time.sleep(2)
-            validation_details = f"""🏦 **ORIGINATING BANK** validates the PACS.008 message format and required fields:
+            for delay, _ in self.CLEARING_STAGES:
+                time.sleep(delay)
+                if not self.run_next_clearing_stage(datetime.now()):
+                    return
+
+        # Start the simulation in a separate thread
+        thread = threading.Thread(target=simulate_clearing)
+        thread.daemon = True
+        thread.start()
+
+    def run_next_clearing_stage(self, at, limit=None):
+        """Run the next pending clearing stage, returning False once the pipeline stops"""
+        with self.clearing_lock:
+            if limit is None:
+                limit = len(self.CLEARING_STAGES)
+            if self.clearing_halted or self.clearing_stage >= limit:
+                return False
+            _, stage_name = self.CLEARING_STAGES[self.clearing_stage]
+            self.clearing_stage += 1
+            with tracing(self.trace), profile_span('clearing'), profile_span(stage_name):
+                result = getattr(self, stage_name)(at)
+            if result is False:
+                self.clearing_halted = True
+            if self.trace is not None and (self.clearing_halted or self.clearing_stage >= len(self.CLEARING_STAGES)):
+                self.trace.release()
+                self.trace = None
+            return not self.clearing_halted
+
+    def next_clearing_due(self):
+        """Scheduled time of the next clearing stage, or None once the pipeline stopped"""
+        if self.clearing_halted or self.clearing_stage >= len(self.CLEARING_STAGES):
+            return None
+        delay = sum(delay for delay, _ in self.CLEARING_STAGES[:self.clearing_stage + 1])
+        return datetime.fromisoformat(self.created_at) + timedelta(seconds=delay)
+
+    def clear_validate_message(self, at):
+        """PACS.008 message validation by the originating bank"""
+        validation_details = f"""🏦 **ORIGINATING BANK** validates the PACS.008 message format and required fields:
 
 📋 **XML Schema Validation** (performed by bank's payment system):
 • Namespace compliance: urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10
@@ -277,8 +777,8 @@ class WireTransfer:
 • GrpHdr/CreDtTm: {datetime.now().strftime("%Y-%m-%dT%H:%M:%S")} ✓
 • GrpHdr/NbOfTxs: 1 ✓
 • GrpHdr/CtrlSum: {self.amount} ✓
-• CdtTrfTxInf/PmtId/InstrId: LYNX{self.id[:16].upper()} ✓
-• CdtTrfTxInf/PmtId/EndToEndId: E2E{self.id[:16].upper()} ✓
+• CdtTrfTxInf/PmtId/InstrId: {self.instruction_id} ✓
+• CdtTrfTxInf/PmtId/EndToEndId: {self.end_to_end_id} ✓
 • CdtTrfTxInf/IntrBkSttlmAmt: {self.amount} {self.currency} ✓
 • CdtTrfTxInf/Dbtr/Nm: {self.debtor_name} ✓
 • CdtTrfTxInf/Cdtr/Nm: {self.creditor_name} ✓
@@ -287,14 +787,15 @@ class WireTransfer:
 
 ✅ **Validation Result**: All required fields present and valid
 📍 **Location**: Originating Bank's Payment Processing System"""
-            
-            self.add_processing_step("PACS.008 message validation", "VALIDATING", validation_details)
-            
-            # Step 2: Bank validation and fund reservation (3 seconds)
-            time.sleep(3)
-            if self.debtor_account.debit(self.amount, f"Wire transfer to {self.creditor_name}", self.id):
-                self.add_processing_step("Bank account validation & fund reservation", "VALIDATING", 
-                                       f"""🏦 **ORIGINATING BANK** validates the debtor account and reserves funds:
+        
+        self.add_processing_step("PACS.008 message validation", "VALIDATING", validation_details, timestamp=at)
+        self.record_event('VALIDATED', at)
+
+    def clear_reserve_funds(self, at):
+        """Debtor account validation and fund reservation"""
+        if self.debtor_account.debit(self.amount, f"Wire transfer to {self.creditor_name}", self.id, timestamp=at):
+            self.add_processing_step("Bank account validation & fund reservation", "VALIDATING", 
+                                   f"""🏦 **ORIGINATING BANK** validates the debtor account and reserves funds:
 
 💰 **Account Validation** (performed by originating bank):
 • Account verification: {self.institution_number}-{self.transit_number}-{self.account_number}
@@ -308,10 +809,11 @@ class WireTransfer:
 • New available balance: {self.debtor_account.balance} {self.currency}
 • Funds held for settlement (not yet transferred)
 
-📍 **Location**: Originating Bank's Core Banking System""")
-            else:
-                self.add_processing_step("Bank account validation failed", "FAILED", 
-                                       f"""❌ **ORIGINATING BANK** validation failed:
+📍 **Location**: Originating Bank's Core Banking System""", timestamp=at)
+            self.record_event('RESERVED', at)
+        else:
+            self.add_processing_step("Bank account validation failed", "FAILED", 
+                                   f"""❌ **ORIGINATING BANK** validation failed:
 
 💰 **Insufficient Funds** (detected by originating bank):
 • Account: {self.institution_number}-{self.transit_number}-{self.account_number}
@@ -320,14 +822,15 @@ class WireTransfer:
 • Shortfall: {self.amount - self.debtor_account.balance} {self.currency}
 
 📍 **Location**: Originating Bank's Core Banking System
-🚫 **Action**: Transfer rejected - no funds reserved""")
-                return
-            
-            # Step 3: Message sent to clearing system (2 seconds)
-            time.sleep(2)
-            clearing_system = "Lynx" if self.currency == "CAD" else "SWIFT"
-            self.add_processing_step("Message sent to Lynx/SWIFT", "PROCESSING", 
-                                   f"""🏦 **ORIGINATING BANK** sends PACS.008 message to clearing system:
+🚫 **Action**: Transfer rejected - no funds reserved""", timestamp=at)
+            self.record_event('REJECTED', at, data={'reason': 'INSUFFICIENT_FUNDS'})
+            return False
+
+    def clear_send_to_network(self, at):
+        """Transmission of the PACS.008 message to Lynx/SWIFT"""
+        clearing_system = self.clearing_system
+        self.add_processing_step("Message sent to Lynx/SWIFT", "PROCESSING", 
+                               f"""🏦 **ORIGINATING BANK** sends PACS.008 message to clearing system:
 
 📤 **Message Transmission** (performed by originating bank):
 • PACS.008 message sent to {clearing_system} clearing system
@@ -339,12 +842,14 @@ class WireTransfer:
 • {'Lynx (Payments Canada domestic system)' if self.currency == 'CAD' else 'SWIFT (international messaging network)'}
 
 📍 **Location**: Originating Bank → {clearing_system} Network
-🔐 **Security**: Encrypted financial messaging""")
-            
-            # Step 4: Clearing processing and interbank settlement (4 seconds)
-            time.sleep(4)
-            self.add_processing_step("Clearing and settlement", "SETTLING", 
-                                   f"""🏛️ **{clearing_system.upper()} CLEARING SYSTEM** processes the interbank settlement:
+🔐 **Security**: Encrypted financial messaging""", timestamp=at)
+        self.record_event('ROUTED', at, data={'clearing_system': clearing_system})
+
+    def clear_settle(self, at):
+        """Interbank clearing and settlement"""
+        clearing_system = self.clearing_system
+        self.add_processing_step("Clearing and settlement", "SETTLING", 
+                               f"""🏛️ **{clearing_system.upper()} CLEARING SYSTEM** processes the interbank settlement:
 
 💼 **Clearing Processing** (performed by {clearing_system}):
 • Message received and validated by {clearing_system}
@@ -358,13 +863,14 @@ class WireTransfer:
 • Funds moved between bank settlement accounts
 
 📍 **Location**: {clearing_system} Clearing System
-⚡ **Processing**: Real-time gross settlement (RTGS)""")
-            
-            # Step 5: Funds credited to beneficiary (2 seconds)
-            time.sleep(2)
-            self.creditor_account.credit(self.amount, f"Wire transfer from {self.debtor_name}", self.id)
-            self.add_processing_step("Funds credited to beneficiary", "COMPLETED", 
-                                   f"""🏦 **RECEIVING BANK** credits funds to the beneficiary account:
+⚡ **Processing**: Real-time gross settlement (RTGS)""", timestamp=at)
+        self.record_event('SETTLED', at)
+
+    def clear_credit_beneficiary(self, at):
+        """Credit of funds to the beneficiary account"""
+        self.creditor_account.credit(self.amount, f"Wire transfer from {self.debtor_name}", self.id, timestamp=at)
+        self.add_processing_step("Funds credited to beneficiary", "COMPLETED", 
+                               f"""🏦 **RECEIVING BANK** credits funds to the beneficiary account:
 
 💰 **Fund Credit** (performed by receiving bank):
 • Amount credited: {self.amount} {self.currency}
@@ -379,17 +885,18 @@ class WireTransfer:
 • Settlement confirmation sent to originating bank
 
 📍 **Location**: Receiving Bank's Core Banking System
-📧 **Notification**: Beneficiary notified of credit""")
-            
-            # Step 6: Generate PACS.002 confirmation message (1 second)
-            time.sleep(1)
-            self.pacs_002_xml = self.generate_pacs_002()
-            self.add_processing_step("PACS.002 confirmation sent", "COMPLETED", 
-                                   f"""🏦 **RECEIVING BANK** sends PACS.002 confirmation to originating bank:
+📧 **Notification**: Beneficiary notified of credit""", timestamp=at)
+        self.record_event('CREDITED', at)
+
+    def clear_send_confirmation(self, at):
+        """PACS.002 confirmation back to the originating bank"""
+        self.pacs_002_xml = self.generate_pacs_002()
+        self.add_processing_step("PACS.002 confirmation sent", "COMPLETED", 
+                               f"""🏦 **RECEIVING BANK** sends PACS.002 confirmation to originating bank:
 
 📤 **Confirmation Message** (sent by receiving bank):
 • PACS.002 status report generated
-• End-to-end reference: E2E{self.id[:16].upper()}
+• End-to-end reference: {self.end_to_end_id}
 • Transaction status: ACSP (AcceptedSettlementCompleted)
 • Confirmation sent to originating bank
 
@@ -399,15 +906,15 @@ class WireTransfer:
 • Transaction traceability maintained throughout process
 
 📍 **Location**: Receiving Bank → Originating Bank
-✅ **Status**: Transfer completed successfully""")
-        
-        # Start the simulation in a separate thread
-        thread = threading.Thread(target=simulate_clearing)
-        thread.daemon = True
-        thread.start()
+✅ **Status**: Transfer completed successfully""", timestamp=at)
+        self.record_event('CONFIRMED', at)
 
+    @profiled('generate_pacs_008')
     def generate_pacs_008(self):
         """Generate ISO 20022 PACS.008 XML message"""
+        import xml.etree.ElementTree as ET
+        from xml.dom import minidom
+
         # Create the root element with proper namespaces
         root = ET.Element("Document", {
             "xmlns": "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10",
@@ -439,9 +946,9 @@ class WireTransfer:
         # Payment Identification
         pmt_id = ET.SubElement(cdt_trf_tx_inf, "PmtId")
         instr_id = ET.SubElement(pmt_id, "InstrId")
-        instr_id.text = f"LYNX{self.id[:16].upper()}"
+        instr_id.text = self.instruction_id
         end_to_end_id = ET.SubElement(pmt_id, "EndToEndId")
-        end_to_end_id.text = f"E2E{self.id[:16].upper()}"
+        end_to_end_id.text = self.end_to_end_id
         
         # Interbank Settlement Amount
         intr_bk_sttlm_amt = ET.SubElement(cdt_trf_tx_inf, "IntrBkSttlmAmt")
@@ -521,8 +1028,9 @@ class WireTransfer:
         reparsed = minidom.parseString(rough_string)
         return reparsed.toprettyxml(indent="  ")
     
-    def to_dict(self):
-        return {
+    @profiled('WireTransfer.to_dict')
+    def to_dict(self, include_accounts=True):
+        data = {
             'id': self.id,
             'debtor_name': self.debtor_name,
             'institution_number': self.institution_number,
@@ -536,16 +1044,395 @@ class WireTransfer:
             'purpose': self.purpose,
             'created_at': self.created_at,
             'status': self.status,
+            'version': self.version,
             'pacs_008_xml': self.pacs_008_xml,
             'pacs_002_xml': self.pacs_002_xml,
             'pacs_004_xml': self.pacs_004_xml,
             'pacs_007_xml': self.pacs_007_xml,
             'processing_steps': self.processing_steps,
-            'bank_accounts_affected': self.bank_accounts_affected,
-            'debtor_account': self.debtor_account.to_dict() if hasattr(self, 'debtor_account') else None,
-            'creditor_account': self.creditor_account.to_dict() if hasattr(self, 'creditor_account') else None
+            'bank_accounts_affected': self.bank_accounts_affected
+        }
+        if include_accounts:
+            data['debtor_account'] = self.debtor_account.to_dict() if hasattr(self, 'debtor_account') else None
+            data['creditor_account'] = self.creditor_account.to_dict() if hasattr(self, 'creditor_account') else None
+        return data
+
+    def to_summary(self):
+        """Lightweight representation for list views"""
+        return {
+            'id': self.id,
+            'debtor_name': self.debtor_name,
+            'creditor_name': self.creditor_name,
+            'amount': self.amount,
+            'currency': self.currency,
+            'status': self.status,
+            'created_at': self.created_at,
+            'version': self.version
         }
 
+# Column order for CSV ledger exports
+LEDGER_FIELDS = [
+    'account_id', 'account_holder', 'currency', 'timestamp', 'type',
+    'amount', 'description', 'transfer_id', 'balance_after'
+]
+
+def iter_transfer_records(since=None, until=None):
+    """Yield transfers one at a time, without embedding account ledgers
+
+    `since` / `until` are ISO strings from parse_export_window(), compared as text
+    against the naive local ISO timestamps the records carry.
+    """
+    # Snapshot the ids only so concurrent inserts don't break iteration
+    for transfer_id in list(transfers):
+        transfer = transfers.get(transfer_id)
+        if transfer is None:
+            continue
+        if since and transfer.created_at < since:
+            continue
+        if until and transfer.created_at >= until:
+            continue
+        yield transfer.to_dict(include_accounts=False)
+
+def iter_ledger_postings(since=None, until=None):
+    """Yield every ledger posting across all bank accounts, one at a time"""
+    for account_id in list(bank_accounts):
+        account = bank_accounts.get(account_id)
+        if account is None:
+            continue
+        # Postings are append-only, so walking up to the current length is safe
+        for index in range(len(account.transactions)):
+            posting = account.transactions[index]
+            if since and posting['timestamp'] < since:
+                continue
+            if until and posting['timestamp'] >= until:
+                continue
+            record = {
+                'account_id': account.account_id,
+                'account_holder': account.account_holder,
+                'currency': account.currency
+            }
+            record.update(posting)
+            yield record
+
+def iter_ndjson(records):
+    """Serialize records as newline-delimited JSON"""
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+def iter_csv(records, fieldnames):
+    """Serialize records as CSV, reusing a single line buffer"""
+    import csv
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only, when there are no records
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_gzip(chunks):
+    """Compress a stream of text chunks into a gzip byte stream"""
+    import zlib
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def iter_event_records(since=None, until=None):
+    """Yield logged events one at a time, in time order
+
+    When `since` is given, the stream starts with snapshot header records (balances and
+    open transfers as of `since`), so a window such as a single day replays on its own.
+    """
+    if since:
+        _, (transfer_states, balances) = event_store.state_at(since)
+        for record in snapshot_records(since, transfer_states, balances):
+            yield event_to_dict(record)
+        del transfer_states, balances
+    for event in event_store.events_between(since, until):
+        yield event_to_dict(event)
+
+def parse_export_window():
+    """Parse the ?since= / ?until= export bounds as naive local ISO strings
+
+    Raises ValueError on invalid timestamps.
+    """
+    return tuple(
+        parse_timestamp(request.args[name]).isoformat() if request.args.get(name) else None
+        for name in ('since', 'until')
+    )
+
+def stream_export(chunks, mimetype, filename):
+    """Build a streaming response, gzip-compressed when ?gzip=1 is given
+
+    Compression is a transfer encoding (Content-Encoding: gzip), so clients that
+    decompress it save the file under its original name.
+    """
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    if request.args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+        chunks = iter_gzip(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+_clearing_sweep_lock = threading.Lock()
+
+def sweep_pending_clearing(now=None):
+    """Catch up clearing stages that fell due for every deferred transfer
+
+    Due stages run in scheduled-time order across all transfers, not transfer by
+    transfer, so fund reservations and ledger postings land in the order they would
+    have with a thread per transfer. Each stage is stamped with its scheduled time.
+    """
+    now = now or datetime.now()
+    # Serialise sweeps so concurrent requests can't interleave stages out of order
+    with _clearing_sweep_lock:
+        due = []
+        # Transfers are queued at the end of WireTransfer.__init__, after publishing
+        # themselves in `transfers`, so every queued transfer is complete
+        for order, transfer in enumerate(list(pending_clearing.values())):
+            due_at = transfer.next_clearing_due()
+            if due_at is None:
+                pending_clearing.pop(transfer.id, None)
+            elif due_at <= now:
+                due.append((due_at, order, transfer))
+        heapq.heapify(due)
+        while due:
+            due_at, order, transfer = heapq.heappop(due)
+            transfer.run_next_clearing_stage(due_at, limit=transfer.clearing_stage + 1)
+            next_due = transfer.next_clearing_due()
+            if next_due is None:
+                pending_clearing.pop(transfer.id, None)
+            elif next_due <= now:
+                heapq.heappush(due, (next_due, order, transfer))
+
+_clearing_sweeper = None
+_clearing_sweeper_lock = threading.Lock()
+
+def ensure_clearing_sweeper(interval=1.0):
+    """Start the single background thread that advances deferred transfers"""
+    global _clearing_sweeper
+    with _clearing_sweeper_lock:
+        if _clearing_sweeper is not None and _clearing_sweeper.is_alive():
+            return
+
+        def sweep_forever():
+            while True:
+                time.sleep(interval)
+                sweep_pending_clearing()
+
+        _clearing_sweeper = threading.Thread(target=sweep_forever)
+        _clearing_sweeper.daemon = True
+        _clearing_sweeper.start()
+
+# Namespace of every pacs.008 version, e.g. urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10
+PACS_008_NAMESPACE_PREFIX = 'urn:iso:std:iso:20022:tech:xsd:pacs.008.'
+
+def _local_name(tag):
+    """Strip the namespace from an ElementTree tag"""
+    return tag.rsplit('}', 1)[-1]
+
+def _split_debtor_account(account_id):
+    """Split a Canadian 'institution+transit+account' identifier"""
+    if len(account_id) > 8 and account_id[:8].isdigit():
+        return account_id[:3], account_id[3:8], account_id[8:]
+    # Foreign or non-Canadian identifier (e.g. an IBAN)
+    return "000", "00000", account_id
+
+def parse_credit_transfer(tx):
+    """Extract WireTransfer fields from a pacs.008 CdtTrfTxInf element"""
+    amount_elem = tx.find('{*}IntrBkSttlmAmt')
+    if amount_elem is None or not (amount_elem.text or '').strip():
+        raise ValueError('Missing IntrBkSttlmAmt')
+    debtor_account = (tx.findtext('{*}DbtrAcct/{*}Id/{*}Othr/{*}Id')
+                      or tx.findtext('{*}DbtrAcct/{*}Id/{*}IBAN'))
+    fields = {
+        'debtor_name': tx.findtext('{*}Dbtr/{*}Nm'),
+        'creditor_name': tx.findtext('{*}Cdtr/{*}Nm'),
+        'creditor_iban': (tx.findtext('{*}CdtrAcct/{*}Id/{*}IBAN')
+                          or tx.findtext('{*}CdtrAcct/{*}Id/{*}Othr/{*}Id')),
+        'creditor_bic': tx.findtext('{*}CdtrAgt/{*}FinInstnId/{*}BICFI'),
+        'currency': amount_elem.get('Ccy'),
+        'debtor_account': debtor_account
+    }
+    for field, value in fields.items():
+        if not value:
+            raise ValueError(f'Missing required field: {field}')
+    try:
+        amount = float(amount_elem.text)
+    except ValueError:
+        raise ValueError(f'Invalid IntrBkSttlmAmt: {amount_elem.text.strip()}')
+    # float() also accepts "nan", "inf" and negatives, which would credit the debtor
+    # or serialise as invalid JSON
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f'IntrBkSttlmAmt must be a positive amount: {amount_elem.text.strip()}')
+    institution_number, transit_number, account_number = _split_debtor_account(fields.pop('debtor_account').strip())
+    fields.update({
+        'institution_number': institution_number,
+        'transit_number': transit_number,
+        'account_number': account_number,
+        'amount': amount,
+        'instruction_id': tx.findtext('{*}PmtId/{*}InstrId'),
+        'end_to_end_id': tx.findtext('{*}PmtId/{*}EndToEndId'),
+        'transaction_id': tx.findtext('{*}PmtId/{*}TxId'),
+        'purpose': (tx.findtext('{*}RmtInf/{*}Ustrd')
+                    or tx.findtext('{*}Purp/{*}Cd')
+                    or 'Inbound pacs.008')
+    })
+    return fields
+
+def ingest_pacs_008(source, max_errors=100):
+    """Stream-parse a pacs.008 document and create one transfer per CdtTrfTxInf
+
+    Transactions are removed from the tree as soon as they are parsed, keeping only
+    their extracted fields. Transfers are created once the whole document has parsed
+    cleanly, so a truncated or malformed file creates none and can be safely resent.
+    Returns an ingestion summary.
+    """
+    import xml.etree.ElementTree as ET
+
+    started = time.perf_counter()
+    msg_id = None
+    namespace = None
+    container = None
+    container_depth = None
+    depth = 0
+    parsed = []
+    ingested = 0
+    rejected = 0
+    errors = []
+
+    def reject(index, error):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors:
+            errors.append({'index': index, 'error': str(error)})
+
+    # Tags repeat for every transaction, so cache their namespace-stripped names
+    local_names = {}
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        name = local_names.get(elem.tag)
+        if name is None:
+            name = local_names[elem.tag] = _local_name(elem.tag)
+        if event == 'start':
+            depth += 1
+            # Validate the document structure before any transfer is created
+            if depth == 1:
+                namespace = elem.tag[1:].split('}', 1)[0] if elem.tag.startswith('{') else ''
+                if name != 'Document' or not namespace.startswith(PACS_008_NAMESPACE_PREFIX):
+                    raise ValueError('Document is not a pacs.008 message')
+                # Re-serialise transactions with the document's default namespace rather than ns0: prefixes
+                ET.register_namespace('', namespace)
+            elif name == 'FIToFICstmrCdtTrf' and depth == 2:
+                container, container_depth = elem, depth
+            elif name == 'CdtTrfTxInf' and (container is None or depth != container_depth + 1):
+                raise ValueError('CdtTrfTxInf found outside FIToFICstmrCdtTrf')
+            continue
+        depth -= 1
+        if name == 'MsgId' and msg_id is None:
+            msg_id = elem.text
+        elif name == 'FIToFICstmrCdtTrf' and elem is container:
+            container = None
+        elif name == 'CdtTrfTxInf':
+            index = len(parsed) + rejected + 1
+            try:
+                fields = parse_credit_transfer(elem)
+                fields['pacs_008_xml'] = ET.tostring(elem, encoding='unicode')
+                parsed.append((index, fields))
+            except ValueError as e:
+                reject(index, e)
+            container.remove(elem)
+    if container_depth is None:
+        raise ValueError('Document is not a pacs.008 FIToFICstmrCdtTrf message')
+
+    for index, fields in parsed:
+        try:
+            WireTransfer(defer_clearing=True, original_msg_id=msg_id, **fields)
+            ingested += 1
+        except ValueError as e:
+            reject(index, e)
+    del parsed
+
+    if not SERVERLESS_MODE and ingested:
+        ensure_clearing_sweeper()
+    elapsed = time.perf_counter() - started
+    return {
+        'msg_id': msg_id,
+        'ingested': ingested,
+        'rejected': rejected,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'transactions_per_second': round((ingested + rejected) / elapsed, 1) if elapsed else None
+    }
+
+def profiling_header():
+    """The X-Profile header value, or '' when the header isn't honoured"""
+    return request.headers.get('X-Profile', '').lower() if PROFILE_ALLOW_HEADER else ''
+
+def profiling_requested():
+    return PROFILING_ENABLED or profiling_header() not in ('0', 'false', 'no', '')
+
+@app.before_request
+def start_request_profiling():
+    """Start a trace (plus cProfile or the stack sampler) for profiled requests"""
+    if not profiling_requested():
+        return
+    mode = profiling_header()
+    mode = mode if mode in ('sample', 'cprofile', 'spans') else PROFILE_MODE
+    g.trace = Trace(request.endpoint or 'request')
+    g.tracing = tracing(g.trace)
+    g.tracing.__enter__()
+    enter_span(request.endpoint or request.path)
+    g.profiler = None
+    g.sampler = None
+    if mode == 'cprofile':
+        import cProfile
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+    elif mode == 'sample':
+        g.sampler = StackSampler(threading.get_ident())
+        g.sampler.start()
+
+@app.after_request
+def add_profile_header(response):
+    trace = g.get('trace')
+    if trace is not None:
+        response.headers['X-Profile-Id'] = trace.id
+    return response
+
+@app.teardown_request
+def finish_request_profiling(exc=None):
+    """Stop profilers and write the collapsed-stack / pstats output"""
+    trace = g.pop('trace', None)
+    if trace is None:
+        return
+    exit_span()
+    g.pop('tracing').__exit__(None, None, None)
+    profiler = g.pop('profiler', None)
+    sampler = g.pop('sampler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{trace.id}.prof"))
+    if sampler is not None:
+        sampler.stop()
+        write_folded(os.path.join(PROFILE_DIR, f"{trace.id}.samples.folded"), sampler.stacks)
+    # Transfers created by the request still hold the trace until they finish clearing;
+    # write what we have now and let the last release rewrite it with their spans
+    if not trace.release():
+        trace.write()
+
+@app.before_request
+def advance_pending_clearing():
+    """Serverless mode: catch up clearing stages that fell due since the last request"""
+    if SERVERLESS_MODE and pending_clearing:
+        sweep_pending_clearing()
+
 @app.route('/')
 def home():
     """Render the home page"""
@@ -581,9 +1468,6 @@ def create_transfer():
             purpose=data['purpose']
         )
         
-        # Store transfer
-        transfers[transfer.id] = transfer
-        
         return jsonify({
             'message': 'Transfer created successfully',
             'transfer_id': transfer.id,
@@ -593,6 +1477,23 @@ def create_transfer():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/ingest/pacs008', methods=['POST'])
+def ingest_pacs008():
+    """Ingest an inbound pacs.008 document (raw XML body or 'file' upload)"""
+    import xml.etree.ElementTree as ET
+
+    upload = request.files.get('file')
+    source = upload.stream if upload else request.stream
+    try:
+        summary = ingest_pacs_008(source)
+    except ET.ParseError as e:
+        return jsonify({'error': f'Malformed XML: {e}'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    summary['message'] = f"Ingested {summary['ingested']} transfers"
+    return jsonify(summary), 201
+
 @app.route('/transfers', methods=['GET'])
 def list_transfers():
     """List all transfers"""
@@ -602,6 +1503,24 @@ def list_transfers():
         'count': len(transfer_list)
     })
 
+@app.route('/transfers/changes', methods=['GET'])
+def list_transfer_changes():
+    """List summaries of transfers changed since a given version"""
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an integer version'}), 400
+
+    # Read the version before scanning; anything updated mid-scan is picked up next time
+    version = current_transfer_version()
+    changed = [transfer.to_summary() for transfer in list(transfers.values()) if transfer.version > since]
+    return jsonify({
+        'transfers': changed,
+        'version': version,
+        'instance': SERVER_INSTANCE_ID,
+        'count': len(transfers)
+    })
+
 @app.route('/transfer/<transfer_id>', methods=['GET'])
 def get_transfer(transfer_id):
     """View transfer details"""
@@ -610,6 +1529,82 @@ def get_transfer(transfer_id):
     
     return jsonify(transfers[transfer_id].to_dict())
 
+@app.route('/transfers/export', methods=['GET'])
+def export_transfers():
+    """Stream all transfers as NDJSON, one transfer per line"""
+    try:
+        since, until = parse_export_window()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+    records = iter_transfer_records(since, until)
+    return stream_export(iter_ndjson(records), 'application/x-ndjson', 'transfers.ndjson')
+
+@app.route('/bank_accounts/export', methods=['GET'])
+def export_ledgers():
+    """Stream all ledger postings as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    try:
+        since, until = parse_export_window()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+    records = iter_ledger_postings(since, until)
+    if export_format == 'csv':
+        return stream_export(iter_csv(records, LEDGER_FIELDS), 'text/csv', 'ledgers.csv')
+    if export_format == 'ndjson':
+        return stream_export(iter_ndjson(records), 'application/x-ndjson', 'ledgers.ndjson')
+    return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+
+@app.route('/events/export', methods=['GET'])
+def export_events():
+    """Stream the lifecycle event log as NDJSON, e.g. to replay a full day offline"""
+    try:
+        since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        until = parse_timestamp(request.args['until']) if request.args.get('until') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+    return stream_export(iter_ndjson(iter_event_records(since, until)), 'application/x-ndjson', 'events.ndjson')
+
+@app.route('/state', methods=['GET'])
+def get_state():
+    """Balances and transfer statuses as of a point in time, rebuilt from events"""
+    try:
+        at = parse_timestamp(request.args['at']) if request.args.get('at') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+
+    events_applied, (transfer_states, balances) = event_store.state_at(at)
+    status_counts = {}
+    for state in transfer_states.values():
+        status_counts[state.status] = status_counts.get(state.status, 0) + 1
+    return jsonify({
+        'at': (at or datetime.now()).isoformat(),
+        'events_applied': events_applied,
+        'balances': balances,
+        'transfer_count': len(transfer_states),
+        'status_counts': status_counts
+    })
+
+@app.route('/transfer/<transfer_id>/history', methods=['GET'])
+def get_transfer_history(transfer_id):
+    """A transfer's lifecycle events and its state as of a point in time"""
+    if transfer_id not in transfers:
+        return jsonify({'error': 'Transfer not found'}), 404
+    try:
+        at = parse_timestamp(request.args['at']) if request.args.get('at') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+
+    state = event_store.transfer_at(transfer_id, at)
+    if state is not None:
+        state = state._asdict()
+        state['updated_at'] = state['updated_at'].isoformat()
+    return jsonify({
+        'transfer_id': transfer_id,
+        'at': (at or datetime.now()).isoformat(),
+        'state': state,
+        'events': [event_to_dict(event) for event in event_store.transfer_events(transfer_id, at)]
+    })
+
 @app.route('/bank_accounts', methods=['GET'])
 def list_bank_accounts():
     """List all bank accounts"""
@@ -622,7 +1617,17 @@ def list_bank_accounts():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'Wire Transfer Simulator API is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Wire Transfer Simulator API is running',
+        'serverless_mode': SERVERLESS_MODE,
+        'cold_start_ms': COLD_START_MS,
+        'pending_clearing': len(pending_clearing)
+    })
+
+# Time spent importing and initializing this module, i.e. the cold start cost
+COLD_START_MS = round((time.perf_counter() - _module_load_started) * 1000, 2)
+app.logger.info("Module initialized in %.2f ms (serverless_mode=%s)", COLD_START_MS, SERVERLESS_MODE)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
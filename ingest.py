@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Command-line ingestion of inbound ISO 20022 pacs.008 files
+
+Usage:
+    python ingest.py payments.xml [more.xml ...]
+    python ingest.py --generate 100000 sample.xml
+    python ingest.py --benchmark 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from app import ingest_pacs_008
+
+SAMPLE_CREDITORS = [
+    ("Jane Smith", "DE89370400440532013000", "COBADEFFXXX"),
+    ("Pierre Martin", "FR7630006000011234567890189", "AGRIFRPPXXX"),
+    ("Maple Supplies Inc", "CA0000000000000000001234", "ROYCCAT2XXX"),
+]
+
+def write_sample_pacs_008(path, count):
+    """Write a multi-transaction pacs.008 document, one transaction at a time"""
+    now = datetime.now()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">\n')
+        f.write('  <FIToFICstmrCdtTrf>\n')
+        f.write(f'    <GrpHdr><MsgId>BULK{now.strftime("%Y%m%d%H%M%S")}</MsgId>'
+                f'<CreDtTm>{now.strftime("%Y-%m-%dT%H:%M:%S")}</CreDtTm>'
+                f'<NbOfTxs>{count}</NbOfTxs></GrpHdr>\n')
+        for i in range(count):
+            creditor_name, creditor_iban, creditor_bic = SAMPLE_CREDITORS[i % len(SAMPLE_CREDITORS)]
+            amount = 10 + (i % 500)
+            f.write(
+                '    <CdtTrfTxInf>'
+                f'<PmtId><InstrId>BULK{i:010d}</InstrId><EndToEndId>E2E{i:010d}</EndToEndId></PmtId>'
+                f'<IntrBkSttlmAmt Ccy="CAD">{amount:.2f}</IntrBkSttlmAmt>'
+                '<ChrgBr>DEBT</ChrgBr>'
+                f'<Dbtr><Nm>{escape(f"Customer {i % 1000}")}</Nm></Dbtr>'
+                f'<DbtrAcct><Id><Othr><Id>00312345{i % 1000:07d}</Id></Othr></Id></DbtrAcct>'
+                '<DbtrAgt><FinInstnId><BICFI>LYNXCA22XXX</BICFI></FinInstnId></DbtrAgt>'
+                f'<CdtrAgt><FinInstnId><BICFI>{creditor_bic}</BICFI></FinInstnId></CdtrAgt>'
+                f'<Cdtr><Nm>{escape(creditor_name)}</Nm></Cdtr>'
+                f'<CdtrAcct><Id><IBAN>{creditor_iban}</IBAN></Id></CdtrAcct>'
+                f'<RmtInf><Ustrd>Invoice {i}</Ustrd></RmtInf>'
+                '</CdtTrfTxInf>\n'
+            )
+        f.write('  </FIToFICstmrCdtTrf>\n')
+        f.write('</Document>\n')
+
+def print_summary(path, summary):
+    """Print an ingestion summary"""
+    print(f"📥 {path} (MsgId: {summary['msg_id']})")
+    print(f"   Ingested: {summary['ingested']}  Rejected: {summary['rejected']}")
+    print(f"   Elapsed: {summary['elapsed_seconds']} s  Throughput: {summary['transactions_per_second']} tx/s")
+    for error in summary['errors']:
+        print(f"   ❌ Transaction {error['index']}: {error['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest inbound pacs.008 files into the simulator")
+    parser.add_argument('files', nargs='*', help="pacs.008 XML files to ingest")
+    parser.add_argument('--generate', nargs=2, metavar=('COUNT', 'PATH'),
+                        help="Write a sample pacs.008 file with COUNT transactions")
+    parser.add_argument('--benchmark', type=int, metavar='COUNT',
+                        help="Generate and ingest COUNT transactions, reporting throughput")
+    args = parser.parse_args()
+
+    if args.generate:
+        count, path = int(args.generate[0]), args.generate[1]
+        write_sample_pacs_008(path, count)
+        print(f"📝 Wrote {count} transactions to {path}")
+        return
+
+    if args.benchmark:
+        fd, path = tempfile.mkstemp(suffix='.xml')
+        os.close(fd)
+        try:
+            write_sample_pacs_008(path, args.benchmark)
+            print_summary(path, ingest_pacs_008(path))
+        finally:
+            os.remove(path)
+        return
+
+    if not args.files:
+        parser.print_help()
+        sys.exit(1)
+
+    for path in args.files:
+        print_summary(path, ingest_pacs_008(path))
+
+if __name__ == '__main__':
+    main()
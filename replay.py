@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Replay a lifecycle event log at CPU speed to benchmark the projection engine
+
+Usage:
+    curl -o events.ndjson "http://localhost:5000/events/export?since=2024-01-01&until=2024-01-02"
+    python replay.py events.ndjson
+    python replay.py --generate 100000 --repeat 3
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import EventStore, event_from_dict, project_events, EVENT_SNAPSHOT_INTERVAL
+
+LIFECYCLE = ['VALIDATED', 'RESERVED', 'ROUTED', 'SETTLED', 'CREDITED', 'CONFIRMED']
+
+def load_events(path):
+    """Load an NDJSON (optionally gzipped) event log"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [event_from_dict(json.loads(line)) for line in f if line.strip()]
+
+def generate_events(count, accounts=1000):
+    """Build a synthetic day of events for `count` transfers between `accounts` accounts"""
+    store = EventStore(snapshot_interval=sys.maxsize)
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(accounts):
+        store.append('ACCOUNT_OPENED', start, account_id=f"ACCT-{i}", data={'balance': 10000.0})
+    step = timedelta(seconds=86400 / max(count, 1))
+    for i in range(count):
+        at = start + step * i
+        transfer_id = f"T{i}"
+        store.append('INITIATED', at, transfer_id=transfer_id, data={
+            'amount': 10.0 + i % 500,
+            'currency': 'CAD',
+            'debtor_account': f"ACCT-{i % accounts}",
+            'creditor_account': f"ACCT-{(i * 7 + 1) % accounts}"
+        })
+        for event_type in LIFECYCLE:
+            store.append(event_type, at, transfer_id=transfer_id)
+    return store.events
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+def rebuild_store(events, snapshot_interval):
+    store = EventStore(snapshot_interval=snapshot_interval)
+    for event in events:
+        store.append(event.type, event.timestamp, event.transfer_id, event.account_id, event.data)
+    return store
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an event log and report throughput")
+    parser.add_argument('file', nargs='?', help="NDJSON event log (from /events/export)")
+    parser.add_argument('--generate', type=int, metavar='TRANSFERS',
+                        help="Replay a synthetic day with this many transfers instead of a file")
+    parser.add_argument('--repeat', type=positive_int, default=1, help="Number of replay runs")
+    parser.add_argument('--snapshot-interval', type=positive_int, default=EVENT_SNAPSHOT_INTERVAL,
+                        help="Snapshot interval used when rebuilding the event store")
+    args = parser.parse_args()
+
+    if args.generate:
+        events = generate_events(args.generate)
+    elif args.file:
+        events = load_events(args.file)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+    print(f"🔁 Replaying {len(events)} events")
+    for run in range(1, args.repeat + 1):
+        (transfer_states, balances), elapsed = timed(lambda: project_events(events))
+        print(f"   Run {run}: projection {elapsed:.3f} s ({len(events) / elapsed:,.0f} events/s)")
+        store, elapsed = timed(lambda: rebuild_store(events, args.snapshot_interval))
+        print(f"   Run {run}: event store with snapshots {elapsed:.3f} s "
+              f"({len(events) / elapsed:,.0f} events/s, {len(store.snapshots) - 1} snapshots)")
+
+    status_counts = {}
+    for state in transfer_states.values():
+        status_counts[state.status] = status_counts.get(state.status, 0) + 1
+    print(f"📊 {len(transfer_states)} transfers, {len(balances)} accounts, statuses: {status_counts}")
+
+if __name__ == '__main__':
+    main()
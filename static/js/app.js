@@ -17,12 +17,47 @@ function App() {
         return () => clearInterval(interval);
     }, []);
 
+    // Highest change version received, the server instance it came from, and each
+    // transfer's position in the list
+    const versionRef = React.useRef(0);
+    const instanceRef = React.useRef(null);
+    const positionsRef = React.useRef(new Map());
+    // Only one poll runs at a time; a fetch requested meanwhile runs once it finishes
+    const inFlightRef = React.useRef(false);
+    const refetchRef = React.useRef(false);
+
     const fetchTransfers = async () => {
+        if (inFlightRef.current) {
+            refetchRef.current = true;
+            return;
+        }
+        inFlightRef.current = true;
         try {
-            const response = await axios.get(`${API_BASE_URL}/transfers`);
-            setTransfers(response.data.transfers);
+            do {
+                refetchRef.current = false;
+                const response = await axios.get(`${API_BASE_URL}/transfers/changes`, {
+                    params: { since: versionRef.current }
+                });
+                const { transfers: changed, version, instance } = response.data;
+                if (instanceRef.current !== null && instance !== instanceRef.current) {
+                    // Server restarted with fresh state; reload everything
+                    instanceRef.current = instance;
+                    versionRef.current = 0;
+                    positionsRef.current = new Map();
+                    setTransfers([]);
+                    refetchRef.current = true;
+                    continue;
+                }
+                instanceRef.current = instance;
+                versionRef.current = version;
+                if (changed.length > 0) {
+                    setTransfers((previous) => mergeTransfers(previous, changed, positionsRef.current));
+                }
+            } while (refetchRef.current);
         } catch (error) {
             console.error('Error fetching transfers:', error);
+        } finally {
+            inFlightRef.current = false;
         }
     };
 
@@ -40,7 +75,8 @@ function App() {
         }
     };
 
-    const viewTransferDetails = async (transferId) => {
+    // Stable callback so memoized rows don't re-render on every tick
+    const viewTransferDetails = React.useCallback(async (transferId) => {
         try {
             const response = await axios.get(`${API_BASE_URL}/transfer/${transferId}`);
             setSelectedTransfer(response.data);
@@ -48,7 +84,7 @@ function App() {
         } catch (error) {
             alert("Failed to fetch transfer details");
         }
-    };
+    }, []);
 
     return (
         <div className="container">
@@ -103,6 +139,23 @@ function App() {
     );
 }
 
+// Merge changed transfer summaries into the list, keeping unchanged rows (and their
+// object identity) intact. `positions` maps transfer id -> index and is updated in place.
+function mergeTransfers(previous, changed, positions) {
+    const next = previous.slice();
+    for (const transfer of changed) {
+        const index = positions.get(transfer.id);
+        // Re-check the id so the updater stays correct if React invokes it twice
+        if (index === undefined || next[index]?.id !== transfer.id) {
+            positions.set(transfer.id, next.length);
+            next.push(transfer);
+        } else if (next[index].version < transfer.version) {
+            next[index] = transfer;
+        }
+    }
+    return next;
+}
+
 function HelpIcon({ tooltip }) {
     return (
         <div className="help-icon">
@@ -312,24 +365,85 @@ function TransferForm({ onSubmit, loading }) {
     );
 }
 
+// Virtualized list settings: rows have a fixed height so the visible window can be
+// computed from the scroll position alone. ROW_HEIGHT matches .virtual-row in
+// index.html; the rendered height is measured in case fonts or zoom change it
+const ROW_HEIGHT = 49;
+const LIST_VIEWPORT_HEIGHT = 600;
+const LIST_OVERSCAN = 10;
+
+function getStatusColor(status) {
+    switch (status) {
+        case 'PENDING': return 'badge-warning';
+        case 'VALIDATING': return 'badge-info';
+        case 'PROCESSING': return 'badge-primary';
+        case 'SETTLING': return 'badge-secondary';
+        case 'COMPLETED': return 'badge-success';
+        case 'FAILED': return 'badge-danger';
+        default: return 'badge-primary';
+    }
+}
+
+const TransferRow = React.memo(function TransferRow({ transfer, onViewDetails }) {
+    return (
+        <tr className="virtual-row">
+            <td>
+                <code style={{ fontSize: '12px' }}>{transfer.id.slice(0, 8)}...</code>
+            </td>
+            <td>{transfer.debtor_name}</td>
+            <td>{transfer.creditor_name}</td>
+            <td>
+                {transfer.amount} {transfer.currency}
+            </td>
+            <td>
+                <span className={`badge ${getStatusColor(transfer.status)}`}>
+                    {transfer.status}
+                </span>
+            </td>
+            <td>
+                {new Date(transfer.created_at).toLocaleDateString()}
+            </td>
+            <td>
+                <button 
+                    className="btn btn-secondary btn-sm" 
+                    onClick={() => onViewDetails(transfer.id)}
+                >
+                    View
+                </button>
+            </td>
+        </tr>
+    );
+});
+
 function TransferList({ transfers, onViewDetails, onRefresh }) {
-    const getStatusColor = (status) => {
-        switch (status) {
-            case 'PENDING': return 'badge-warning';
-            case 'VALIDATING': return 'badge-info';
-            case 'PROCESSING': return 'badge-primary';
-            case 'SETTLING': return 'badge-secondary';
-            case 'COMPLETED': return 'badge-success';
-            case 'FAILED': return 'badge-danger';
-            default: return 'badge-primary';
+    const [scrollTop, setScrollTop] = React.useState(0);
+    const [rowHeight, setRowHeight] = React.useState(ROW_HEIGHT);
+    const bodyRef = React.useRef(null);
+
+    // Only the rows in view (plus some overscan) are rendered; spacer rows keep the
+    // scrollbar sized for the full list
+    const start = Math.max(0, Math.floor(scrollTop / rowHeight) - LIST_OVERSCAN);
+    const end = Math.min(
+        transfers.length,
+        Math.ceil((scrollTop + LIST_VIEWPORT_HEIGHT) / rowHeight) + LIST_OVERSCAN
+    );
+    const visibleTransfers = transfers.slice(start, end);
+
+    React.useLayoutEffect(() => {
+        const row = bodyRef.current && bodyRef.current.querySelector('.virtual-row');
+        if (row) {
+            const measured = row.getBoundingClientRect().height;
+            if (measured > 0 && Math.abs(measured - rowHeight) > 0.5) {
+                setRowHeight(measured);
+            }
         }
-    };
+    });
 
     return (
         <div className="card">
             <div className="card-header">
                 <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
-                    <h2>Transfer History</h2>
+                    <h2>Transfer History ({transfers.length})</h2>
                     <button onClick={onRefresh} className="btn btn-secondary btn-sm">
                         Refresh
                     </button>
@@ -341,7 +455,11 @@ function TransferList({ transfers, onViewDetails, onRefresh }) {
                         No transfers found. Create your first transfer above.
                     </div>
                 ) : (
-                    <div className="table-wrapper">
+                    <div 
+                        className="table-wrapper virtual-scroll"
+                        style={{ maxHeight: LIST_VIEWPORT_HEIGHT }}
+                        onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+                    >
                         <table className="table">
                             <thead>
                                 <tr>
@@ -354,35 +472,20 @@ function TransferList({ transfers, onViewDetails, onRefresh }) {
                                     <th>Actions</th>
                                 </tr>
                             </thead>
-                            <tbody>
-                                {transfers.map((transfer) => (
-                                    <tr key={transfer.id}>
-                                        <td>
-                                            <code style={{ fontSize: '12px' }}>{transfer.id.slice(0, 8)}...</code>
-                                        </td>
-                                        <td>{transfer.debtor_name}</td>
-                                        <td>{transfer.creditor_name}</td>
-                                        <td>
-                                            {transfer.amount} {transfer.currency}
-                                        </td>
-                                        <td>
-                                            <span className={`badge ${getStatusColor(transfer.status)}`}>
-                                                {transfer.status}
-                                            </span>
-                                        </td>
-                                        <td>
-                                            {new Date(transfer.created_at).toLocaleDateString()}
-                                        </td>
-                                        <td>
-                                            <button 
-                                                className="btn btn-secondary btn-sm" 
-                                                onClick={() => onViewDetails(transfer.id)}
-                                            >
-                                                View
-                                            </button>
-                                        </td>
-                                    </tr>
+                            <tbody ref={bodyRef}>
+                                {start > 0 && (
+                                    <tr style={{ height: start * rowHeight }} />
+                                )}
+                                {visibleTransfers.map((transfer) => (
+                                    <TransferRow 
+                                        key={transfer.id}
+                                        transfer={transfer}
+                                        onViewDetails={onViewDetails}
+                                    />
                                 ))}
+                                {end < transfers.length && (
+                                    <tr style={{ height: (transfers.length - end) * rowHeight }} />
+                                )}
                             </tbody>
                         </table>
                     </div>
@@ -15,7 +15,9 @@ def test_health_check():
     try:
         response = requests.get(f"{BASE_URL}/api/health")
         if response.status_code == 200:
+            data = response.json()
             print("✅ Health check passed")
+            print(f"   Serverless mode: {data.get('serverless_mode')}, cold start: {data.get('cold_start_ms')} ms")
             return True
         else:
             print(f"❌ Health check failed: {response.status_code}")
@@ -59,6 +61,25 @@ def test_create_transfer():
         print(f"❌ Error creating transfer: {e}")
         return None
 
+def test_profiled_request():
+    """Test opt-in profiling of a request"""
+    print("🔍 Testing request profiling...")
+    try:
+        response = requests.get(f"{BASE_URL}/transfers", headers={'X-Profile': 'spans'})
+        profile_id = response.headers.get('X-Profile-Id')
+        if response.status_code == 200 and profile_id:
+            print(f"✅ Profile written: {profile_id}.spans.folded")
+            return True
+        elif response.status_code == 200:
+            print("⚠️  X-Profile header ignored (start the server with PROFILE_ALLOW_HEADER=1)")
+            return True
+        else:
+            print(f"❌ Profiled request failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error profiling request: {e}")
+        return False
+
 def test_list_transfers():
     """Test listing transfers"""
     print("🔍 Testing transfer listing...")
@@ -75,6 +96,23 @@ def test_list_transfers():
         print(f"❌ Error listing transfers: {e}")
         return False
 
+def test_transfer_changes():
+    """Test delta fetching of changed transfers"""
+    print("🔍 Testing transfer change feed...")
+    try:
+        response = requests.get(f"{BASE_URL}/transfers/changes")
+        if response.status_code != 200:
+            print(f"❌ Transfer change feed failed: {response.status_code}")
+            return False
+        version = response.json()['version']
+        response = requests.get(f"{BASE_URL}/transfers/changes", params={"since": version})
+        data = response.json()
+        print(f"✅ At version {version}, {len(data['transfers'])} transfers changed since")
+        return True
+    except Exception as e:
+        print(f"❌ Error fetching transfer changes: {e}")
+        return False
+
 def test_get_transfer(transfer_id):
     """Test getting a specific transfer"""
     print(f"🔍 Testing transfer details for {transfer_id}...")
@@ -95,6 +133,141 @@ def test_get_transfer(transfer_id):
         print(f"❌ Error getting transfer details: {e}")
         return False
 
+def test_transfer_history(transfer_id):
+    """Test the event-sourced history of a transfer"""
+    print(f"🔍 Testing transfer history for {transfer_id}...")
+    try:
+        response = requests.get(f"{BASE_URL}/transfer/{transfer_id}/history")
+        if response.status_code == 200:
+            data = response.json()
+            event_types = [event['type'] for event in data['events']]
+            print(f"✅ Transfer is {data['state']['status']} after events: {', '.join(event_types)}")
+            return True
+        else:
+            print(f"❌ Transfer history failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error getting transfer history: {e}")
+        return False
+
+def test_export_transfers():
+    """Test streaming NDJSON export of transfers"""
+    print("🔍 Testing transfer export...")
+    try:
+        response = requests.get(f"{BASE_URL}/transfers/export", stream=True)
+        if response.status_code == 200:
+            count = sum(1 for line in response.iter_lines() if line)
+            print(f"✅ Exported {count} transfers as NDJSON")
+            response = requests.get(f"{BASE_URL}/transfers/export", params={"since": "garbage"})
+            if response.status_code != 400:
+                print(f"❌ Invalid since accepted: {response.status_code}")
+                return False
+            return True
+        else:
+            print(f"❌ Transfer export failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error exporting transfers: {e}")
+        return False
+
+def test_export_ledgers():
+    """Test streaming CSV export of ledger postings"""
+    print("🔍 Testing ledger export...")
+    try:
+        response = requests.get(f"{BASE_URL}/bank_accounts/export",
+                                params={"format": "csv", "gzip": 1}, stream=True)
+        if response.status_code == 200:
+            rows = [line for line in response.iter_lines() if line]
+            print(f"✅ Exported {len(rows) - 1} ledger postings as CSV")
+            return True
+        else:
+            print(f"❌ Ledger export failed: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error exporting ledgers: {e}")
+        return False
+
+def test_ingest_pacs008():
+    """Test ingesting an inbound pacs.008 document"""
+    print("🔍 Testing pacs.008 ingestion...")
+    
+    document = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
+  <FIToFICstmrCdtTrf>
+    <GrpHdr><MsgId>TESTINGEST001</MsgId><NbOfTxs>2</NbOfTxs></GrpHdr>
+    <CdtTrfTxInf>
+      <PmtId><InstrId>TESTINSTR001</InstrId><EndToEndId>TESTE2E001</EndToEndId></PmtId>
+      <IntrBkSttlmAmt Ccy="CAD">250.00</IntrBkSttlmAmt>
+      <Dbtr><Nm>John Doe</Nm></Dbtr>
+      <DbtrAcct><Id><Othr><Id>003123451234567890</Id></Othr></Id></DbtrAcct>
+      <CdtrAgt><FinInstnId><BICFI>COBADEFFXXX</BICFI></FinInstnId></CdtrAgt>
+      <Cdtr><Nm>Jane Smith</Nm></Cdtr>
+      <CdtrAcct><Id><IBAN>DE89370400440532013000</IBAN></Id></CdtrAcct>
+    </CdtTrfTxInf>
+    <CdtTrfTxInf>
+      <IntrBkSttlmAmt Ccy="CAD">-500.00</IntrBkSttlmAmt>
+      <Dbtr><Nm>John Doe</Nm></Dbtr>
+      <DbtrAcct><Id><Othr><Id>003123451234567890</Id></Othr></Id></DbtrAcct>
+      <CdtrAgt><FinInstnId><BICFI>COBADEFFXXX</BICFI></FinInstnId></CdtrAgt>
+      <Cdtr><Nm>Jane Smith</Nm></Cdtr>
+      <CdtrAcct><Id><IBAN>DE89370400440532013000</IBAN></Id></CdtrAcct>
+    </CdtTrfTxInf>
+  </FIToFICstmrCdtTrf>
+</Document>"""
+    
+    try:
+        response = requests.post(f"{BASE_URL}/ingest/pacs008", data=document,
+                                 headers={'Content-Type': 'application/xml'})
+        if response.status_code == 201:
+            data = response.json()
+            if data['ingested'] != 1 or data['rejected'] != 1:
+                print(f"❌ Expected the negative amount to be rejected: {data}")
+                return False
+            print(f"✅ Ingested {data['ingested']} transfers ({data['transactions_per_second']} tx/s)")
+            return True
+        else:
+            print(f"❌ pacs.008 ingestion failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+    except Exception as e:
+        print(f"❌ Error ingesting pacs.008: {e}")
+        return False
+
+def test_ingest_truncated_pacs008():
+    """Test that a truncated pacs.008 document creates no transfers"""
+    print("🔍 Testing truncated pacs.008 ingestion...")
+    
+    transaction = """
+    <CdtTrfTxInf>
+      <IntrBkSttlmAmt Ccy="CAD">100.00</IntrBkSttlmAmt>
+      <Dbtr><Nm>John Doe</Nm></Dbtr>
+      <DbtrAcct><Id><Othr><Id>003123451234567890</Id></Othr></Id></DbtrAcct>
+      <CdtrAgt><FinInstnId><BICFI>COBADEFFXXX</BICFI></FinInstnId></CdtrAgt>
+      <Cdtr><Nm>Jane Smith</Nm></Cdtr>
+      <CdtrAcct><Id><IBAN>DE89370400440532013000</IBAN></Id></CdtrAcct>
+    </CdtTrfTxInf>"""
+    # Three complete transactions, then the upload is cut off mid-element
+    document = ("""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
+  <FIToFICstmrCdtTrf>
+    <GrpHdr><MsgId>TESTTRUNC001</MsgId><NbOfTxs>4</NbOfTxs></GrpHdr>""" + transaction * 3 +
+                "\n    <CdtTrfTxInf><IntrBkSttlmAmt Ccy=")
+    
+    try:
+        before = requests.get(f"{BASE_URL}/transfers/changes", params={"since": 0}).json()['count']
+        response = requests.post(f"{BASE_URL}/ingest/pacs008", data=document,
+                                 headers={'Content-Type': 'application/xml'})
+        after = requests.get(f"{BASE_URL}/transfers/changes", params={"since": 0}).json()['count']
+        if response.status_code == 400 and after == before:
+            print("✅ Truncated document rejected without creating transfers")
+            return True
+        else:
+            print(f"❌ Truncated document: status {response.status_code}, {after - before} transfers created")
+            return False
+    except Exception as e:
+        print(f"❌ Error ingesting truncated pacs.008: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Testing Canadian Wire Transfer Simulator API")
@@ -117,11 +290,26 @@ def main():
     
     # Test listing transfers
     test_list_transfers()
+    test_transfer_changes()
+    test_profiled_request()
     
     print()
     
     # Test getting transfer details
     test_get_transfer(transfer_id)
+    test_transfer_history(transfer_id)
+    
+    print()
+    
+    # Test streaming exports
+    test_export_transfers()
+    test_export_ledgers()
+    
+    print()
+    
+    # Test inbound pacs.008 ingestion
+    test_ingest_pacs008()
+    test_ingest_truncated_pacs008()
     
     print()
     print("🎉 All tests completed!")
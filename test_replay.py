@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline checks for the lifecycle event log: exporting a window and replaying it
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import app
+from app import EventStore, project_events
+from replay import load_events, LIFECYCLE
+
+DAY_ONE = datetime(2024, 1, 1)
+DAY_TWO = datetime(2024, 1, 2)
+DAY_THREE = datetime(2024, 1, 3)
+
+def build_store(snapshot_interval=7):
+    """Two days of transfers, some crossing midnight and some still open at the end"""
+    store = EventStore(snapshot_interval=snapshot_interval)
+    for i in range(5):
+        store.append('ACCOUNT_OPENED', DAY_ONE, account_id=f"ACCT-{i}", data={'balance': 1000.0})
+    for i in range(12):
+        initiated = DAY_ONE + timedelta(hours=2 * i + 1)
+        transfer_id = f"T{i}"
+        store.append('INITIATED', initiated, transfer_id=transfer_id, data={
+            'amount': 10.0 * (i + 1),
+            'currency': 'CAD',
+            'debtor_account': f"ACCT-{i % 5}",
+            'creditor_account': f"ACCT-{(i + 1) % 5}"
+        })
+        # T11 is still in flight at the end of day two
+        stages = LIFECYCLE if i != 11 else LIFECYCLE[:3]
+        for n, event_type in enumerate(stages, start=1):
+            store.append(event_type, initiated + timedelta(minutes=45 * n), transfer_id=transfer_id)
+    for i in range(12, 15):
+        initiated = DAY_TWO + timedelta(hours=i)
+        store.append('INITIATED', initiated, transfer_id=f"T{i}", data={
+            'amount': 5.0, 'currency': 'CAD',
+            'debtor_account': 'ACCT-0', 'creditor_account': 'ACCT-4'
+        })
+    return store
+
+@contextmanager
+def using_store(store):
+    """Swap app.event_store for the duration of a test, restoring it afterwards"""
+    original_store = app.event_store
+    app.event_store = store
+    try:
+        yield store
+    finally:
+        app.event_store = original_store
+
+def export_window(since, until):
+    """Export a window through the API and load it back the way replay.py does"""
+    client = app.app.test_client()
+    response = client.get("/events/export", query_string={'since': since.isoformat(), 'until': until.isoformat()})
+    assert response.status_code == 200, response.status_code
+    fd, path = tempfile.mkstemp(suffix='.ndjson')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response.get_data())
+        return load_events(path)
+    finally:
+        os.remove(path)
+
+def test_replay_day_after_first():
+    """A day export that isn't the first replays to the live state at its end"""
+    print("🔍 Testing replay of the second day's export...")
+    with using_store(build_store()) as store:
+        events = export_window(DAY_TWO, DAY_THREE)
+    assert events[0].type == 'SNAPSHOT_ACCOUNT', events[0].type
+    transfer_states, balances = project_events(events)
+
+    _, (expected_states, expected_balances) = store.state_at(DAY_THREE)
+    assert balances == expected_balances, (balances, expected_balances)
+    for transfer_id, state in transfer_states.items():
+        assert state == expected_states[transfer_id], (state, expected_states[transfer_id])
+    assert transfer_states['T11'].status == 'PROCESSING', transfer_states['T11']
+    print(f"✅ Replayed {len(events)} records, {len(transfer_states)} transfers carried into the day")
+    return True
+
+def test_late_stage_keeps_timestamp():
+    """A stage logged after later events keeps its own timestamp for time-travel reads"""
+    print("🔍 Testing out-of-order stage timestamps...")
+    store = build_store(snapshot_interval=3)
+    late_at = DAY_TWO + timedelta(hours=15, minutes=30)
+    store.append('VALIDATED', late_at, transfer_id='T13')
+    store.append('ACCOUNT_OPENED', DAY_TWO + timedelta(hours=20), account_id='ACCT-9', data={'balance': 1.0})
+    store.append('RESERVED', DAY_TWO + timedelta(hours=15, minutes=45), transfer_id='T13')
+
+    assert store.transfer_at('T13', late_at).last_event == 'VALIDATED'
+    for at in (late_at - timedelta(seconds=1), late_at, DAY_TWO + timedelta(hours=21), None):
+        _, (transfer_states, balances) = store.state_at(at)
+        expected_states, expected_balances = project_events(
+            event for event in store.events if at is None or event.timestamp <= at
+        )
+        assert transfer_states == expected_states and balances == expected_balances, at
+    print("✅ Time-travel reads match a full replay around the late stage")
+    return True
+
+def test_timezone_aware_timestamps():
+    """Timezone-aware query timestamps are normalised instead of failing"""
+    print("🔍 Testing timezone-aware timestamps...")
+    client = app.app.test_client()
+    at = DAY_TWO.astimezone(timezone.utc).isoformat()
+    with using_store(build_store()) as store:
+        response = client.get("/state", query_string={'at': at})
+        assert response.status_code == 200, response.status_code
+        expected, _ = store.state_at(DAY_TWO)
+        assert json.loads(response.get_data())['events_applied'] == expected
+
+        response = client.get("/state?at=yesterday")
+        assert response.status_code == 400, response.status_code
+    print("✅ Aware timestamps accepted, invalid ones rejected with 400")
+    return True
+
+def main():
+    """Run all replay checks"""
+    print("🚀 Starting event log replay tests")
+    print("=" * 50)
+    test_replay_day_after_first()
+    print()
+    test_late_stage_keeps_timestamp()
+    print()
+    test_timezone_aware_timestamps()
+    print("=" * 50)
+    print("🎉 Replay tests completed!")
+
+if __name__ == "__main__":
+    main()